@@ -1,18 +1,30 @@
+import asyncio
 import json
+import os
+import shutil
 import numpy as np
 import pandas as pd
-from qiskit_aer import Aer
+from module.backend import BackendManager  # Importiere den Backend-Manager
 from module.circuit import Circuit, Layer
 from module.tokenizer import Tokenizer  # Importiere die Tokenizer-Klasse
 from module.optimizer import AdamOptimizer  # Importiere den AdamOptimizer
 from module.visual import Visual  # Importiere die Visual-Klasse
+from module.sequence import PrefixStateCache  # Importiere den Präfix-Cache
+from module.scheduler import JobScheduler  # Importiere den Job-Scheduler
+from module.index import WordStateIndex  # Importiere den Wort-Zustands-Index
+from module.cache import EvaluationCache  # Importiere den Auswertungs-Cache
+from module.seeding import set_seed, get_rng, spawn_rngs, circuit_seed  # Globaler Seed
+from module.retention import LossHistory, TraceSpill, top_k_counts  # Speichergrenzen
+from module.product_state import ProductStateResult  # Exakte Produktzustände
 
 
 class LLYGLLM:
     """LLY-GLLM class that reads configuration from a JSON file and creates a quantum circuit."""
 
-    def __init__(self, config_file, learning_rate=0.01, max_iterations=100):
+    def __init__(self, config_file, learning_rate=0.01, max_iterations=100, seed=None):
         self.config_file = config_file
+        self.seed = seed  # Globaler Seed für TP-Matrix, Optimierer und Simulator
+        self.explicit_seed = seed  # Ein übergebener Seed hat Vorrang vor der Konfiguration
         self.qubits = 0
         self.l_gates = 0
         self.circuit = None
@@ -20,13 +32,23 @@ class LLYGLLM:
         self.learning_rate = learning_rate
         self.max_iterations = max_iterations
         self.tp_matrix = None
+        self.prefix_cache = None  # Zwischengespeicherte Präfix-Zustände
+        self.word_index = None  # Fingerabdrücke der Wortzustände
+        self.trained_phases = {}  # Wort oder Kombination -> optimierte TP-Matrix
         self.initial_summary = []  # Speichere initiale Zustände
         self.final_summary = []  # Speichere finale Zustände
         self.iterations = 0  # Iterationen
         self.shots = 0  # Anzahl der Schüsse
+        self.max_in_flight = 4  # Gleichzeitig trainierte Wörter
+        self.loss_capacity = 1024  # Maximal gespeicherte Verlustwerte pro Eintrag
+        self.loss_mode = "downsample"  # "downsample" oder "ring"
+        self.top_k_counts = 32  # Gespeicherte Zustände pro Eintrag
+        self.trace_spill = None  # Vollständige Counts/Verluste auf der Platte
+        self.loss_iterations = {}  # Eintrag -> Iteration jedes aufbewahrten Verlustwerts
 
     def load_configuration(self):
         """Load the number of qubits, L-gates, iterations, and shots from a JSON file."""
+        data = None
         try:
             with open(self.config_file, "r") as file:
                 data = json.load(file)
@@ -35,13 +57,19 @@ class LLYGLLM:
 
                 # Anzahl der Qubits entspricht der Anzahl der Wörter
                 self.qubits = len(self.single_words)
-                self.l_gates = len(self.single_words) + 2 * len(
-                    self.word_combinations
-                )  # Ein Layer pro Wort + Zwei Layer pro Kombination
+
+                # Jeder Qubit braucht eine Spalte der IP-Matrix
+                self.tokenizer.token_length = max(self.tokenizer.token_length, self.qubits)
+                self.l_gates = len(self.single_words) + sum(
+                    len(combination.split()) for combination in self.word_combinations
+                )  # Ein Layer pro Wort + Ein Layer pro Wort jeder Kombination
 
                 # Lade Iterationen und Shots
                 self.iterations = data.get("iterations", self.max_iterations)
                 self.shots = data.get("shots", 1024)
+                self.max_in_flight = data.get("max_in_flight", self.max_in_flight)
+                if self.explicit_seed is None:
+                    self.seed = data.get("seed")
 
                 # Debug-Ausgabe zur Überprüfung der geladenen Werte
                 print(
@@ -57,8 +85,37 @@ class LLYGLLM:
         except Exception as e:
             print(f"An unexpected error occurred: {e}")
 
+        # Ungültige Simulator-Einstellungen brechen ab, statt still Standardwerte zu nutzen
+        if data is not None:
+            self.configure_simulation(data)
+
+    def configure_simulation(self, data):
+        """Configure the simulator, evaluation cache and retention rules; invalid values raise."""
+        for block in ("backend", "evaluation_cache", "retention"):
+            if not isinstance(data.get(block, {}), dict):
+                raise ValueError(f"Configuration block '{block}' must be a JSON object.")
+
+        # Aufbewahrungsregeln für Verlustverläufe und Counts
+        retention = data.get("retention", {})
+        loss_capacity = retention.get("loss_capacity", self.loss_capacity)
+        loss_mode = retention.get("loss_mode", self.loss_mode)
+        LossHistory.check_options(loss_capacity, loss_mode)
+        top_k = retention.get("top_k_counts", self.top_k_counts)
+        if top_k is not None and (not isinstance(top_k, int) or top_k < 1):
+            raise ValueError("top_k_counts must be an integer >= 1 or null.")
+        self.loss_capacity = loss_capacity
+        self.loss_mode = loss_mode
+        self.top_k_counts = top_k
+        if retention.get("spill_directory"):
+            self.trace_spill = TraceSpill(retention["spill_directory"])
+        # Ohne Angabe laufen so viele Simulator-Jobs parallel wie Wörter trainiert werden
+        backend = dict(data.get("backend", {}))
+        backend.setdefault("job_workers", self.max_in_flight)
+        BackendManager.configure(**backend)
+        EvaluationCache.configure(**data.get("evaluation_cache", {}))
+
     def tokenize_word(self, word):
-        """Tokenize a single word and return a 3x20 matrix of tokens."""
+        """Tokenize a single word and return a 3 x token_length matrix of tokens."""
         token = self.tokenizer.tokenize(word)
         return np.array(
             token
@@ -76,11 +133,21 @@ class LLYGLLM:
             )
 
         layers = []
+        self.word_index = WordStateIndex()
 
-        # Generiere einmalige Trainingsphasen
-        self.tp_matrix = np.random.rand(3, self.qubits) * 2 * np.pi
+        # Generiere einmalige Trainingsphasen (reproduzierbar bei gesetztem Seed)
+        set_seed(self.seed)
+        self.tp_matrix = get_rng().random((3, self.qubits)) * 2 * np.pi
         print(f"TP Matrix (constant):\n{self.tp_matrix}\n")
 
+        # Präfix-Zustände werden mit der konstanten TP-Matrix berechnet
+        self.prefix_cache = PrefixStateCache(
+            self.qubits,
+            self.tp_matrix,
+            self.tokenize_word,
+            kind=BackendManager.get().prefix_state_kind(),
+        )
+
         # Erste Schleife: Einzelwörter
         for word in self.single_words:
             # Tokenize das aktuelle Wort
@@ -93,19 +160,26 @@ class LLYGLLM:
             print(f"IP Matrix for word '{word}':\n{ip_matrix}\n")
 
             # Erzeuge Circuit und führe ihn aus
-            circuit = Circuit(self.qubits, [layers[-1]], self.shots)
+            circuit = Circuit(self.qubits, [layers[-1]], self.shots, seed=circuit_seed(word))
             state, probability, counts = self.run_single_layer(circuit)
 
             # Zustand speichern zusammen mit dem Wort
+            self.word_index.add(word, self.state_distribution(circuit))
+            if self.trace_spill is not None:
+                self.trace_spill.write(word, counts, kind="initial")
             self.initial_summary.append(
                 {
                     "Wort": word,
                     "Zustand": state,
                     "Wahrscheinlichkeit": probability,
-                    "Counts": counts,
+                    "Counts": top_k_counts(counts, self.top_k_counts),
                 }
             )
 
+        # Melde Wörter, die auf denselben Zustand fallen
+        for state, words in self.word_index.collisions().items():
+            print(f"Warning: Words {', '.join(words)} share the state {state}.")
+
         # Initiale Tabelle mit Layer-Informationen anzeigen
         self.display_summary(
             self.initial_summary, title="Initial Summary of Circuit Layers"
@@ -113,9 +187,20 @@ class LLYGLLM:
 
     def run_single_layer(self, circuit):
         """Run a single layer of the quantum circuit and return the result state and its probability."""
-        simulator = Aer.get_backend("aer_simulator")
-        circuit.run(simulator)
-        counts = circuit.get_counts()
+        result = circuit.run()
+        return self.most_likely_state(circuit.get_counts(), result)
+
+    async def run_single_layer_async(self, circuit):
+        """Like run_single_layer(), but without blocking the event loop."""
+        result = await circuit.run_async()
+        return self.most_likely_state(circuit.get_counts(), result)
+
+    def most_likely_state(self, counts, result=None):
+        """Return the most likely state, its probability and the counts."""
+        if isinstance(result, ProductStateResult) and result.state is not None:
+            # Exakt pro Qubit statt aus wenigen Stichproben vieler gleich seltener Zustände
+            max_state, probability = result.state.max_state()
+            return max_state, probability, counts
 
         # Finde den Zustand mit der höchsten Wahrscheinlichkeit
         total_shots = sum(counts.values())
@@ -124,6 +209,24 @@ class LLYGLLM:
 
         return max_state, probability, counts
 
+    def state_distribution(self, circuit):
+        """
+        Return the distribution the word index compares: the exact top-k probabilities
+        of a product-state run, otherwise the counts of the last run.
+        """
+        result = circuit.simulation_result
+        if isinstance(result, ProductStateResult) and result.state is not None:
+            return result.state.top_states(self.word_index.top_k)
+        return circuit.get_counts()
+
+    def nearest_word(self, counts):
+        """
+        Return the word whose initial distribution is nearest to the counts, with its fidelity,
+        or (None, 0.0) if no word has been indexed yet.
+        """
+        nearest = self.word_index.nearest(counts)
+        return nearest[0] if nearest else (None, 0.0)
+
     def display_summary(self, summary, title="Summary of Circuit Layers"):
         """Display a summary table of the circuit layers and their words."""
         df = pd.DataFrame(summary)
@@ -131,129 +234,173 @@ class LLYGLLM:
         print(df.to_string(index=False))
 
     def train(self):
-        """Train the quantum circuit to optimize the TP matrix for each word in single_words."""
-        simulator = Aer.get_backend(
-            "aer_simulator"
-        )  # Den Simulator hier initialisieren
-
-        # Erste Schleife: Training mit einzelnen Wörtern
-        for summary in self.initial_summary:
-            word = summary["Wort"]
-            initial_state = summary["Zustand"]
+        """
+        Train the quantum circuit to optimize the TP matrix for each word in single_words.
+        Starts its own event loop and therefore cannot be called from a running one
+        (e.g. in a notebook or the inference server); await train_async() there instead.
+        """
+        asyncio.run(self.train_async())
+
+    async def train_async(self):
+        """Train all words and word combinations with several simulator jobs in flight (primary API)."""
+        # Eigener Zufallsgenerator pro Job, damit die Reihenfolge der Jobs egal ist
+        rngs = iter(spawn_rngs(len(self.initial_summary) + len(self.word_combinations)))
+
+        # Einzelwörter und Wortkombinationen sind unabhängig und laufen verzahnt
+        jobs = [self.train_word(summary, next(rngs)) for summary in self.initial_summary] + [
+            self.train_combination(combination, result, next(rngs))
+            for combination, result in self.word_combinations.items()
+        ]
+        self.final_summary.extend(await JobScheduler(self.max_in_flight).run(jobs))
 
-            # Tokenize das aktuelle Wort
-            ip_matrix = self.tokenize_word(word)
+        print(
+            f"Präfix-Cache: {len(self.prefix_cache)} Zustände, "
+            f"{self.prefix_cache.hits} Treffer, {self.prefix_cache.misses} Berechnungen"
+        )
+        evaluation_cache = EvaluationCache.get_default()
+        print(
+            f"Auswertungs-Cache: {len(evaluation_cache)} Ergebnisse, "
+            f"{evaluation_cache.hits} Treffer, {evaluation_cache.misses} Simulationen"
+        )
 
-            # Erzeuge ein neues Layer mit dem konstanten TP und dem aktuellen IP
-            layer = Layer(self.qubits, self.tp_matrix, ip_matrix)
+        # Finalisierte Tabelle mit Layer-Informationen anzeigen
+        self.display_summary(
+            self.final_summary, title="Final Summary of Circuit Layers"
+        )
 
-            # Erzeuge Circuit
-            circuit = Circuit(self.qubits, [layer], self.shots)
+        # Vergleiche initiale und finale Zustände
+        self.compare_summaries(self.initial_summary, self.final_summary)
 
-            # Verwende den AdamOptimizer zur Optimierung der TP-Matrix
-            optimizer = AdamOptimizer(
-                circuit=circuit,
-                target_state=initial_state,
-                learning_rate=self.learning_rate,
-                max_iterations=self.iterations,
-            )
+    async def train_word(self, summary, rng=None):
+        """Optimize the TP matrix of a single word towards its initial state."""
+        word = summary["Wort"]
+        name = word
+        initial_state = summary["Zustand"]
+
+        # Tokenize das aktuelle Wort
+        ip_matrix = self.tokenize_word(word)
+
+        # Erzeuge ein neues Layer mit dem konstanten TP und dem aktuellen IP
+        layer = Layer(self.qubits, self.tp_matrix, ip_matrix)
+
+        # Erzeuge Circuit
+        circuit = Circuit(self.qubits, [layer], self.shots, seed=circuit_seed(word))
+
+        # Verwende den AdamOptimizer zur Optimierung der TP-Matrix
+        optimizer = AdamOptimizer(
+            circuit=circuit,
+            target_state=initial_state,
+            learning_rate=self.learning_rate,
+            max_iterations=self.iterations,
+            rng=rng,
+            loss_history=self.new_loss_history(name),
+        )
 
-            # Optimiere die Trainingsphasen
-            optimized_phases, losses = optimizer.optimize()
+        # Optimiere die Trainingsphasen
+        optimized_phases, losses = await optimizer.optimize_async()
 
-            # Ausgabe der Ergebnisse der Optimierung
-            print(f"\nOptimierung für Wort: {word}")
-            print(f"Optimierte Trainingsphasen:\n{optimized_phases}\n")
-            print(f"Verlustverlauf:\n{losses}\n")
+        # Ausgabe der Ergebnisse der Optimierung
+        print(f"\nOptimierung für Wort: {word}")
+        print(f"Optimierte Trainingsphasen:\n{optimized_phases}\n")
+        print(f"Verlustverlauf:\n{losses}\n")
 
-            # Aktualisiere die TP-Matrix mit den optimierten Phasen
-            layer.tp_matrix = optimized_phases
+        # Aktualisiere die TP-Matrix mit den optimierten Phasen
+        layer.tp_matrix = optimized_phases
+        self.trained_phases[word] = optimized_phases
 
-            # Führe den Circuit mit den optimierten Phasen erneut aus
-            state_optimized, probability_optimized, counts_optimized = (
-                self.run_single_layer(circuit)
-            )
-
-            # Speichere den optimierten Zustand zusammen mit dem Wort
-            self.final_summary.append(
-                {
-                    "Wort": word,
-                    "Zustand": state_optimized,
-                    "Wahrscheinlichkeit": probability_optimized,
-                    "Counts": counts_optimized,
-                    "Loss": losses,
-                }
-            )
+        # Führe den Circuit mit den optimierten Phasen erneut aus
+        state_optimized, probability_optimized, counts_optimized = (
+            await self.run_single_layer_async(circuit)
+        )
 
-        # Zweite Schleife: Training mit Wortkombinationen
-        for combination, result in self.word_combinations.items():
-            first_word, second_word = combination.split()
-
-            # Tokenize das erste und zweite Wort der Kombination
-            first_ip_matrix = self.tokenize_word(first_word)
-            second_ip_matrix = self.tokenize_word(second_word)
-
-            # Erzeuge Layer für beide Wörter mit der gleichen TP-Matrix
-            first_layer = Layer(self.qubits, self.tp_matrix, first_ip_matrix)
-            second_layer = Layer(self.qubits, self.tp_matrix, second_ip_matrix)
-
-            # Erzeuge Circuit mit zwei Layern
-            circuit = Circuit(self.qubits, [first_layer, second_layer], self.shots)
-
-            # Finde den Zielzustand (state) für das Ergebnis der Kombination
-            _, target_probability, _ = self.run_single_layer(circuit)
-
-            # Suche den erwarteten Zustand des resultierenden Wortes
-            expected_state = None
-            for summary in self.initial_summary:
-                if summary["Wort"] == result:
-                    expected_state = summary["Zustand"]
-                    break
-
-            # Verwende den AdamOptimizer zur Optimierung der TP-Matrix des zweiten Layers
-            optimizer = AdamOptimizer(
-                circuit=circuit,
-                target_state=expected_state,  # Der Zielzustand ist das resultierende Wort
-                learning_rate=self.learning_rate,
-                max_iterations=self.iterations,
-            )
+        # Gib den optimierten Zustand zusammen mit dem Wort zurück
+        counts_retained, losses_retained = self.retain(name, counts_optimized, losses)
+        return {
+            "Wort": name,
+            "Zustand": state_optimized,
+            "Wahrscheinlichkeit": probability_optimized,
+            "Counts": counts_retained,
+            "Loss": losses_retained,
+        }
+
+    async def train_combination(self, combination, result, rng=None):
+        """Optimize the TP matrix of the last layer of a word sequence towards its result word."""
+        words = combination.split()
+        name = f"{combination} = {result}"
+
+        # Zustand nach allen Wörtern außer dem letzten (aus dem Präfix-Cache),
+        # oder deren Layer, falls sie im Circuit simuliert werden müssen
+        prefix_state, prefix_layers = self.prefix_cache.prefix(words[:-1])
+
+        # Erzeuge Layer für das letzte Wort mit der gleichen TP-Matrix
+        last_layer = Layer(self.qubits, self.tp_matrix, self.tokenize_word(words[-1]))
+
+        # Erzeuge Circuit, der im Präfix-Zustand startet; trainiert wird das letzte Layer
+        circuit = Circuit(
+            self.qubits,
+            prefix_layers + [last_layer],
+            self.shots,
+            initial_state=prefix_state,
+            seed=circuit_seed(" ".join(words)),
+        )
 
-            # Optimiere die Trainingsphasen des zweiten Layers
-            optimized_phases, losses = optimizer.optimize()
+        # Suche den erwarteten Zustand des resultierenden Wortes
+        expected_state = self.word_index.max_state(result)
+
+        # Verwende den AdamOptimizer zur Optimierung der TP-Matrix des letzten Layers
+        optimizer = AdamOptimizer(
+            circuit=circuit,
+            target_state=expected_state,  # Der Zielzustand ist das resultierende Wort
+            learning_rate=self.learning_rate,
+            max_iterations=self.iterations,
+            rng=rng,
+            loss_history=self.new_loss_history(name),
+        )
 
-            # Ausgabe der Ergebnisse der Optimierung
-            print(f"\nOptimierung für Kombination: {combination} = {result}")
-            print(
-                f"Optimierte Trainingsphasen für zweites Layer:\n{optimized_phases}\n"
-            )
-            print(f"Verlustverlauf:\n{losses}\n")
+        # Optimiere die Trainingsphasen des letzten Layers
+        optimized_phases, losses = await optimizer.optimize_async()
 
-            # Aktualisiere die TP-Matrix des zweiten Layers mit den optimierten Phasen
-            second_layer.tp_matrix = optimized_phases
+        # Ausgabe der Ergebnisse der Optimierung
+        print(f"\nOptimierung für Kombination: {combination} = {result}")
+        print(f"Optimierte Trainingsphasen für letztes Layer:\n{optimized_phases}\n")
+        print(f"Verlustverlauf:\n{losses}\n")
 
-            # Führe den Circuit mit den optimierten Phasen erneut aus
-            state_optimized, probability_optimized, counts_optimized = (
-                self.run_single_layer(circuit)
-            )
+        # Aktualisiere die TP-Matrix des letzten Layers mit den optimierten Phasen
+        last_layer.tp_matrix = optimized_phases
+        self.trained_phases[combination] = optimized_phases
 
-            # Speichere den optimierten Zustand zusammen mit dem Ergebniswort
-            self.final_summary.append(
-                {
-                    "Wort": f"{combination} = {result}",
-                    "Zustand": state_optimized,
-                    "Wahrscheinlichkeit": probability_optimized,
-                    "Counts": counts_optimized,
-                    "Loss": losses,
-                }
-            )
+        # Führe den Circuit mit den optimierten Phasen erneut aus
+        state_optimized, probability_optimized, counts_optimized = (
+            await self.run_single_layer_async(circuit)
+        )
 
-        # Finalisierte Tabelle mit Layer-Informationen anzeigen
-        self.display_summary(
-            self.final_summary, title="Final Summary of Circuit Layers"
+        nearest_word, fidelity = self.nearest_word(self.state_distribution(circuit))
+        print(f"Nächstes Wort für {combination}: {nearest_word} (Fidelity {fidelity:.4f})")
+
+        # Gib den optimierten Zustand zusammen mit dem Ergebniswort zurück
+        counts_retained, losses_retained = self.retain(name, counts_optimized, losses)
+        return {
+            "Wort": name,
+            "Zustand": state_optimized,
+            "Wahrscheinlichkeit": probability_optimized,
+            "Counts": counts_retained,
+            "Loss": losses_retained,
+        }
+
+    def new_loss_history(self, name):
+        """Return a bounded loss history, streaming the full trace to disk if spilling is enabled."""
+        trace_file = (
+            self.trace_spill.path(name, "losses", ".f32") if self.trace_spill is not None else None
         )
+        return LossHistory(self.loss_capacity, self.loss_mode, trace_file)
 
-        # Vergleiche initiale und finale Zustände
-        self.compare_summaries(self.initial_summary, self.final_summary)
+    def retain(self, name, counts, losses):
+        """Return the top-k counts and retained losses, spilling the full counts to disk."""
+        losses.close()
+        if self.trace_spill is not None:
+            self.trace_spill.write(name, counts)
+        self.loss_iterations[name] = losses.iterations()
+        return top_k_counts(counts, self.top_k_counts), losses.values()
 
     def compare_summaries(self, initial_summary, final_summary):
         """Compare initial and final summaries to show the improvement."""
@@ -284,9 +431,44 @@ class LLYGLLM:
         print(comparison_df.to_string(index=False))
 
         # Plot the comparison using Visual class
-        visual = Visual(self.final_summary, comparison_df, self.iterations, self.shots)
+        visual = Visual(
+            self.final_summary,
+            comparison_df,
+            circuits=None,
+            num_iterations=self.iterations,
+            qubits=self.qubits,
+            depth=self.l_gates,
+            loss_iterations=self.loss_iterations,
+        )
         visual.generate_report()
 
+    def save_model(self, directory):
+        """Save the TP matrices and the word-state index so the model can be served."""
+        os.makedirs(directory, exist_ok=True)
+
+        # Vollständige Simulator-Einstellungen, das Rauschmodell liegt beim Modell
+        backend = dict(BackendManager.get().options)
+        if backend["noise_model_file"]:
+            shutil.copyfile(backend["noise_model_file"], os.path.join(directory, "noise_model.json"))
+            backend["noise_model_file"] = "noise_model.json"  # Relativ zum Modellverzeichnis
+
+        model = {
+            "qubits": self.qubits,
+            "token_length": self.tokenizer.token_length,
+            "shots": self.shots,
+            "seed": self.seed,
+            "backend": backend,
+            "tp_matrix": np.asarray(self.tp_matrix).tolist(),
+            "trained_phases": {
+                key: np.asarray(phases).tolist()
+                for key, phases in self.trained_phases.items()
+            },
+        }
+        with open(os.path.join(directory, "model.json"), "w") as file:
+            json.dump(model, file)
+        self.word_index.save(directory)
+        print(f"Model saved to {directory}")
+
     def __repr__(self):
         """Return a string representation of the circuit."""
         if self.circuit is not None:
@@ -295,14 +477,17 @@ class LLYGLLM:
 
 
 # Beispiel für die Nutzung der LLY-GLLM-Klasse
+if __name__ == "__main__":
+    # Erstelle eine Instanz von LLY-GLLM mit dem Pfad zur Konfigurationsdatei
+    lly_gllm = LLYGLLM("var/train.json", learning_rate=0.01, max_iterations=100)
 
-# Erstelle eine Instanz von LLY-GLLM mit dem Pfad zur Konfigurationsdatei
-lly_gllm = LLYGLLM("var/train.json", learning_rate=0.01, max_iterations=100)
+    # Erstelle den Quantum Circuit
+    lly_gllm.create()
 
-# Erstelle den Quantum Circuit
-lly_gllm.create()
+    # Trainiere den Quantum Circuit
+    lly_gllm.train()
 
-# Trainiere den Quantum Circuit
-lly_gllm.train()
+    # Speichere das trainierte Modell für den Inferenz-Server (module/server.py)
+    lly_gllm.save_model("var/model")
 
-# Die Ausgabe des Quanten-Circuits ist in der Zusammenfassung enthalten
+    # Die Ausgabe des Quanten-Circuits ist in der Zusammenfassung enthalten
@@ -0,0 +1,160 @@
+import hashlib
+import inspect
+import json
+import threading
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from qiskit import transpile
+from qiskit_aer import AerSimulator
+from qiskit_aer.noise import NoiseModel
+
+
+class BackendManager:
+    """Builds one configured AerSimulator per process and caches transpiled circuits."""
+
+    # "product_state" simuliert Circuits ohne Verschränkung qubitweise und
+    # fällt für alle anderen auf Aers matrix_product_state zurück
+    METHODS = ("statevector", "density_matrix", "matrix_product_state", "product_state")
+
+    _instance = None  # Prozessweite Instanz
+
+    def __init__(
+        self,
+        method="statevector",
+        threads=0,
+        noise_model_file=None,
+        seed=None,
+        job_workers=1,
+    ):
+        if method not in self.METHODS:
+            raise ValueError(
+                f"Unknown simulation method '{method}'. Choose one of {', '.join(self.METHODS)}."
+            )
+        if not isinstance(threads, int) or threads < 0:
+            raise ValueError("threads must be an integer >= 0 (0 = all available threads).")
+        if not isinstance(job_workers, int) or job_workers < 1:
+            raise ValueError("job_workers must be an integer >= 1.")
+        self.options = self.normalize_options(
+            method=method,
+            threads=threads,
+            noise_model_file=noise_model_file,
+            seed=seed,
+            job_workers=job_workers,
+        )
+        self.method = method
+        self.threads = threads  # 0 = alle verfügbaren Threads
+        self.seed = seed
+        self.job_workers = job_workers  # Anzahl gleichzeitig ausgeführter Jobs
+        self.noise_model = None
+        self.noise_model_hash = None  # Inhalt des Rauschmodells, nicht der Dateiname
+        if noise_model_file:
+            self.noise_model, self.noise_model_hash = self.load_noise_model(noise_model_file)
+
+        aer_method = "matrix_product_state" if method == "product_state" else method
+        options = {"method": aer_method, "max_parallel_threads": threads}
+        if self.noise_model is not None:
+            options["noise_model"] = self.noise_model
+        if seed is not None:
+            options["seed_simulator"] = seed
+        self.executor = None
+        if job_workers > 1:
+            self.executor = ThreadPoolExecutor(max_workers=job_workers)
+            options["executor"] = self.executor
+        self.backend = AerSimulator(**options)
+
+        self.transpile_cache = {}  # Struktur-Schlüssel -> transpilierter Circuit
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def normalize_options(cls, **options):
+        """Return the options with all defaults filled in, so that equal configurations compare equal."""
+        bound = inspect.signature(cls).bind(**options)
+        bound.apply_defaults()
+        return dict(bound.arguments)
+
+    @classmethod
+    def configure(cls, **options):
+        """
+        Configure the process-wide backend manager. The current one (and its transpile
+        cache) is kept if the options are unchanged, otherwise it is replaced.
+        """
+        if cls._instance is not None and cls._instance.options == cls.normalize_options(**options):
+            return cls._instance
+        manager = cls(**options)  # Ungültige Optionen lassen die alte Instanz bestehen
+        if cls._instance is not None:
+            cls._instance.close()
+        cls._instance = manager
+        return cls._instance
+
+    @classmethod
+    def get(cls):
+        """Return the process-wide backend manager, creating a default one if needed."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @staticmethod
+    def load_noise_model(noise_model_file):
+        """
+        Load a noise model from a local JSON file in Qiskit's NoiseModel dict format.
+        Returns the noise model and a hash of its contents.
+        NoiseModel.from_dict is deprecated since qiskit-aer 0.15 without a replacement for
+        JSON files, so requirements.txt pins qiskit-aer below the next minor release.
+        """
+        with open(noise_model_file, "r") as file:
+            data = json.load(file)
+        content_hash = hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", "from_dict has been deprecated", DeprecationWarning)
+            return NoiseModel.from_dict(data), content_hash
+
+    @property
+    def signature(self):
+        """Return the part of the configuration that determines simulation results."""
+        return (self.method, self.noise_model_hash, self.seed)
+
+    def prefix_state_kind(self):
+        """
+        Return how prefix states may be cached: "product_state" or None.
+        None means the prefix layers must be simulated as gates inside the circuit, so that
+        a noise model or a density matrix / MPS simulation also acts on them.
+        """
+        if self.noise_model is not None or self.method in ("density_matrix", "matrix_product_state"):
+            return None
+        return "product_state"
+
+    def transpile(self, key, build_circuit, backend=None):
+        """
+        Return the transpiled circuit for a structure key, transpiling only on the first request.
+        :param key: Hashable description of the circuit structure.
+        :param build_circuit: Callable returning the (parameterized) circuit to transpile.
+        :param backend: Backend to transpile for, defaults to the managed simulator.
+        """
+        backend = backend or self.backend
+        cache_key = (key, backend.name, id(backend))
+        with self._lock:
+            compiled = self.transpile_cache.get(cache_key)
+            if compiled is not None:
+                self.hits += 1
+                return compiled
+            self.misses += 1
+
+        compiled = transpile(build_circuit(), backend)
+        with self._lock:
+            self.transpile_cache[cache_key] = compiled
+        return compiled
+
+    def close(self):
+        """Shut down the job executor; already submitted jobs still finish."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def clear(self):
+        """Drop all cached transpiled circuits."""
+        with self._lock:
+            self.transpile_cache.clear()
+            self.hits = 0
+            self.misses = 0
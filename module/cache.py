@@ -0,0 +1,118 @@
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+class LRUCache:
+    """Thread-safe mapping that evicts the least recently used entries beyond max_size."""
+
+    def __init__(self, max_size=4096):
+        if not isinstance(max_size, int) or max_size < 1:
+            raise ValueError("max_size must be an integer >= 1.")
+        self.max_size = max_size
+        self.results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for a key, or None."""
+        if key is None:
+            return None
+        with self._lock:
+            result = self.results.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.results.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        """Store a value and evict the least recently used ones beyond max_size."""
+        if key is None:
+            return
+        with self._lock:
+            self.results[key] = result
+            self.results.move_to_end(key)
+            while len(self.results) > self.max_size:
+                self.results.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached values."""
+        with self._lock:
+            self.results.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self.results)
+
+
+class EvaluationCache(LRUCache):
+    """LRU cache of simulation results keyed by IP hash, quantized TP matrix, shots and seed."""
+
+    _instance = None  # Prozessweite Instanz
+
+    def __init__(self, max_size=4096, decimals=8):
+        super().__init__(max_size)
+        if not isinstance(decimals, int) or decimals < 0:
+            raise ValueError("decimals must be an integer >= 0.")
+        self.options = self.normalize_options(max_size=max_size, decimals=decimals)
+        self.decimals = decimals  # Rundung der TP-Matrix für den Schlüssel
+
+    @classmethod
+    def normalize_options(cls, **options):
+        """Return the options with all defaults filled in, so that equal configurations compare equal."""
+        bound = inspect.signature(cls).bind(**options)
+        bound.apply_defaults()
+        return dict(bound.arguments)
+
+    @classmethod
+    def configure(cls, **options):
+        """
+        Configure the process-wide evaluation cache. The current one (and its results)
+        is kept if the options are unchanged, otherwise it is replaced.
+        """
+        if cls._instance is not None and cls._instance.options == cls.normalize_options(**options):
+            return cls._instance
+        cls._instance = cls(**options)
+        return cls._instance
+
+    @classmethod
+    def get_default(cls):
+        """Return the process-wide evaluation cache, creating a default one if needed."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @staticmethod
+    def fingerprint(array):
+        """Return a short hash of an array's contents."""
+        data = np.ascontiguousarray(array)
+        return hashlib.sha1(data.tobytes()).hexdigest()
+
+    def key(self, circuit, signature):
+        """
+        Return the cache key of a circuit with its current phases, or None if it is unseeded.
+        :param signature: Configuration of the simulator, see BackendManager.signature.
+        """
+        if circuit.seed is None:
+            return None  # Ohne Seed ist jede Auswertung eine neue Stichprobe
+        ip_hash = self.fingerprint(
+            np.concatenate([np.asarray(layer.ip_matrix, dtype=float) for layer in circuit.layers])
+        )
+        tp_quantized = tuple(
+            np.round(np.asarray(layer.tp_matrix, dtype=float), self.decimals).tobytes()
+            for layer in circuit.layers
+        )
+        return (
+            ip_hash,
+            tp_quantized,
+            circuit.initial_state_hash,
+            circuit.shots,
+            circuit.seed,
+            signature,
+        )
@@ -1,9 +1,10 @@
-from qiskit import (
-    QuantumCircuit,
-    transpile,
-)  # Stellen Sie sicher, dass 'transpile' importiert ist
+import asyncio
+from qiskit import QuantumCircuit
+from qiskit.circuit import ParameterVector
 import numpy as np
-from qiskit_aer import Aer  # Importiere den Simulator hier
+from module.backend import BackendManager  # Prozessweiter Simulator mit Transpile-Cache
+from module.cache import EvaluationCache  # LRU-Cache für Auswertungen
+from module.product_state import ProductState, ProductStateResult
 
 
 class LGate:
@@ -32,12 +33,20 @@ class Layer:
 
     def __init__(self, qubits, tp_matrix, ip_matrix):
         self.qubits = qubits
-        self.tp_matrix = tp_matrix  # Speichern der TP-Matrix
-        self.ip_matrix = ip_matrix  # Speichern der IP-Matrix
+        self.ip_matrix = np.asarray(ip_matrix)  # Speichern der IP-Matrix
+        self.tp_matrix = tp_matrix  # Speichern der TP-Matrix (erzeugt die L-Gates)
 
+    @property
+    def tp_matrix(self):
+        return self._tp_matrix
+
+    @tp_matrix.setter
+    def tp_matrix(self, tp_matrix):
+        """Set new training phases and rebuild the L-Gates with them."""
+        self._tp_matrix = np.asarray(tp_matrix)
         self.l_gates = [
-            LGate(qubit, tp_matrix[:, qubit], ip_matrix[:, qubit])
-            for qubit in range(qubits)
+            LGate(qubit, self._tp_matrix[:, qubit], self.ip_matrix[:, qubit])
+            for qubit in range(self.qubits)
         ]
 
     def apply(self, circuit):
@@ -45,14 +54,38 @@ class Layer:
         for l_gate in self.l_gates:
             l_gate.apply(circuit)
 
+    def is_product(self):
+        """Return True if the layer only contains single-qubit L-Gates (no entanglement)."""
+        return all(isinstance(l_gate, LGate) for l_gate in self.l_gates)
+
+    def matrices(self):
+        """Return the 2x2 unitary of every L-Gate as an array of shape (qubits, 2, 2)."""
+        phases = (
+            np.asarray(self.tp_matrix, dtype=float)[:, : self.qubits]
+            + np.asarray(self.ip_matrix, dtype=float)[:, : self.qubits]
+        )
+        hadamard = np.array([[1, 1], [1, -1]], dtype=complex) / np.sqrt(2)
+        unitaries = np.tile(np.eye(2, dtype=complex), (self.qubits, 1, 1))
+        for i in range(3):
+            # Phasengatter P(TP + IP) skaliert die |1>-Zeile
+            unitaries[:, 1, :] *= np.exp(1j * phases[i])[:, None]
+            if i < 2:
+                unitaries = hadamard @ unitaries
+        return unitaries
+
 
 class Circuit:
     """Represents a quantum circuit composed of multiple layers."""
 
-    def __init__(self, qubits, layers, shots):
+    def __init__(self, qubits, layers, shots, initial_state=None, seed=None):
         self.qubits = qubits
         self.layers = layers  # List of Layer objects
         self.shots = shots
+        self.seed = seed  # Seed des Simulators (None = nicht reproduzierbar)
+        self.initial_state = initial_state  # Optionaler ProductState eines Präfixes
+        self.initial_state_hash = None
+        if initial_state is not None:
+            self.initial_state_hash = EvaluationCache.fingerprint(initial_state.factors)
         self.circuit = QuantumCircuit(qubits, qubits)
         self.simulation_result = None
 
@@ -61,31 +94,179 @@ class Circuit:
 
     def build_circuit(self):
         """Build the quantum circuit by applying each layer in sequence."""
+        self.prepare_initial_state(self.circuit)
         for layer in self.layers:
             layer.apply(self.circuit)
 
+    def prepare_initial_state(self, circuit, angles=None):
+        """
+        Prepare the cached state of the previous layers, if any, with one U gate per qubit.
+        :param angles: Optional (theta, phi) per qubit, e.g. template parameters.
+        """
+        if self.initial_state is None:
+            return
+        theta, phi = self.initial_state.angles() if angles is None else angles
+        for qubit in range(self.qubits):
+            circuit.u(theta[qubit], phi[qubit], 0, qubit)
+
+    def rebuild(self):
+        """Rebuild the circuit so that changed training phases take effect."""
+        self.circuit = QuantumCircuit(self.qubits, self.qubits)
+        self.build_circuit()
+        self.measure()
+
     def measure(self):
         """Add measurement operations to all qubits."""
         self.circuit.measure(range(self.qubits), range(self.qubits))
 
+    def template_key(self):
+        """Return the structure key under which the transpiled template is cached."""
+        return ("lgate_layers", self.qubits, len(self.layers), self.initial_state is not None)
+
+    def build_template(self):
+        """Build a measured circuit whose TP and IP phases are parameters."""
+        template = QuantumCircuit(self.qubits, self.qubits)
+        self.prepare_initial_state(
+            template,
+            (ParameterVector("prefix_theta", self.qubits), ParameterVector("prefix_phi", self.qubits)),
+        )
+        size = 3 * self.qubits
+        for index in range(len(self.layers)):
+            tp = np.array(list(ParameterVector(f"tp{index}", size)), dtype=object)
+            ip = np.array(list(ParameterVector(f"ip{index}", size)), dtype=object)
+            Layer(
+                self.qubits, tp.reshape(3, self.qubits), ip.reshape(3, self.qubits)
+            ).apply(template)
+        template.measure(range(self.qubits), range(self.qubits))
+        return template
+
+    def parameter_values(self):
+        """Return the current phases of all layers keyed by template parameter name."""
+        values = {}
+        if self.initial_state is not None:
+            theta, phi = self.initial_state.angles()
+            for qubit in range(self.qubits):
+                values[f"prefix_theta[{qubit}]"] = theta[qubit]
+                values[f"prefix_phi[{qubit}]"] = phi[qubit]
+        for index, layer in enumerate(self.layers):
+            tp = np.asarray(layer.tp_matrix, dtype=float)[:, : self.qubits].flatten()
+            ip = np.asarray(layer.ip_matrix, dtype=float)[:, : self.qubits].flatten()
+            for position in range(tp.size):
+                values[f"tp{index}[{position}]"] = tp[position]
+                values[f"ip{index}[{position}]"] = ip[position]
+        return values
+
+    def compile(self, simulator=None, values=None):
+        """
+        Return a runnable circuit from the cached transpiled template and the current phases.
+        :param values: Phases from parameter_values(), taken now if not given.
+        """
+        manager = BackendManager.get()
+        compiled = manager.transpile(
+            self.template_key(), self.build_template, simulator
+        )
+        if values is None:
+            values = self.parameter_values()
+        # Der Präfix-Zustand ist Teil des Templates, es werden nur Parameter gebunden
+        return compiled.assign_parameters(
+            {parameter: values[parameter.name] for parameter in compiled.parameters}
+        )
+
+    def submit(self, simulator=None, values=None):
+        """Submit the circuit with its current (or the given) phases and return the job without waiting."""
+        if simulator is None:
+            simulator = BackendManager.get().backend  # Konfigurierter Aer Simulator
+        options = {"shots": self.shots}
+        if self.seed is not None:
+            options["seed_simulator"] = self.seed
+        return simulator.run(self.compile(simulator, values), **options)
+
+    def simulator_job(self, simulator=None):
+        """Return a callable that compiles, submits and waits for the current phases."""
+        # Phasen jetzt festhalten, der Aufruf kann später in einem anderen Thread laufen
+        values = self.parameter_values()
+        return lambda: self.submit(simulator, values).result()
+
+    def is_product(self):
+        """Return True if the circuit can be simulated as a product state."""
+        return all(layer.is_product() for layer in self.layers)
+
+    def uses_product_state(self, simulator=None):
+        """Return True if this run should use the (noise-free) product-state simulation."""
+        manager = BackendManager.get()
+        return (
+            simulator is None
+            and manager.method == "product_state"
+            and manager.noise_model is None
+            and self.is_product()
+        )
+
+    def product_state_job(self):
+        """Return a callable that simulates the current phases as a product state."""
+        # Phasen jetzt festhalten, der Aufruf kann später in einem anderen Thread laufen
+        matrices = [layer.matrices() for layer in self.layers]
+        state = self.initial_state
+        if state is None:
+            state = ProductState.zero(self.qubits)
+
+        def job():
+            final_state = state
+            for layer_matrices in matrices:
+                final_state = final_state.apply(layer_matrices)
+            return ProductStateResult(
+                final_state.sample_counts(self.shots, np.random.default_rng(self.seed)),
+                final_state,
+            )
+
+        return job
+
+    def run_product_state(self):
+        """Simulate the circuit as one 2-vector per qubit and sample its counts."""
+        return self.product_state_job()()
+
+    def cache_key(self, simulator=None):
+        """Return the evaluation cache key for the current phases, or None if uncacheable."""
+        manager = BackendManager.get()
+        if simulator is not None and simulator is not manager.backend:
+            return None  # Fremde Simulatoren haben keine bekannte Konfiguration
+        return EvaluationCache.get_default().key(self, manager.signature)
+
     def run(self, simulator=None):
         """Run the quantum circuit simulation and return the result."""
-        if simulator is None:
-            simulator = Aer.get_backend(
-                "aer_simulator"
-            )  # Standardmäßig den Aer Simulator verwenden
-        compiled_circuit = transpile(
-            self.circuit, simulator
-        )  # Ensure transpile is used here
-        self.simulation_result = simulator.run(
-            compiled_circuit, shots=self.shots
-        ).result()
+        cache = EvaluationCache.get_default()
+        key = self.cache_key(simulator)
+        result = cache.get(key)
+        if result is None and self.uses_product_state(simulator):
+            result = self.run_product_state()
+            cache.put(key, result)
+        elif result is None:
+            result = self.submit(simulator).result()
+            cache.put(key, result)
+        self.simulation_result = result
+        return self.simulation_result
+
+    async def run_async(self, simulator=None):
+        """Run the quantum circuit simulation without blocking the event loop."""
+        cache = EvaluationCache.get_default()
+        key = self.cache_key(simulator)  # Phasen werden vor dem ersten await übernommen
+        result = cache.get(key)
+        if result is None and self.uses_product_state(simulator):
+            # Ohne Simulator-Job, aber ebenfalls außerhalb der Event-Loop berechnet
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(None, self.product_state_job())
+            cache.put(key, result)
+        elif result is None:
+            # Binden, Abschicken und Warten laufen außerhalb der Event-Loop
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(None, self.simulator_job(simulator))
+            cache.put(key, result)
+        self.simulation_result = result
         return self.simulation_result
 
     def get_counts(self):
         """Return the counts from the last simulation run."""
         if self.simulation_result is not None:
-            return self.simulation_result.get_counts(self.circuit)
+            return self.simulation_result.get_counts()
         else:
             raise RuntimeError("The circuit has not been run yet.")
 
@@ -109,13 +290,8 @@ class Circuit:
             # Debugging: Print optimized training phases
             print(f"Optimized TP Matrix for Layer:\n{layer.tp_matrix}\n")
 
-            # Apply the updated layer to the circuit
-            self.circuit = QuantumCircuit(self.qubits, self.qubits)  # Reset circuit
-            self.build_circuit()  # Rebuild with new training phases
-            self.measure()
-
             # Run the optimized circuit and evaluate results
-            self.run(simulator)
+            self.run()
             counts = self.get_counts()
             max_state = max(counts, key=counts.get)
             probability = counts[max_state] / sum(counts.values())
@@ -125,4 +301,5 @@ class Circuit:
             )
 
     def __repr__(self):
+        self.rebuild()  # Aktuelle TP-Matrizen der Layer übernehmen
         return self.circuit.draw(output="text").__str__()
@@ -0,0 +1,177 @@
+import json
+import os
+import numpy as np
+
+
+class WordStateIndex:
+    """Stores a top-k probability fingerprint per word and finds the nearest word by fidelity."""
+
+    def __init__(self, top_k=32):
+        self.top_k = top_k  # Anzahl gespeicherter Zustände pro Wort
+        self.words = []
+        self.rows = {}  # Wort -> Zeile
+        self.states = {}  # Bitstring -> Spalte
+        self.state_labels = []  # Spalte -> Bitstring
+        self.columns = np.zeros((0, top_k), dtype=np.int32)
+        self.amplitudes = np.zeros((0, top_k), dtype=np.float16)  # sqrt(p)
+        self._pending = []  # Noch nicht gestapelte Zeilen
+        self._postings = None  # Spalte -> (Zeilen, Amplituden), invertierter Index
+
+    def top_amplitudes(self, counts):
+        """
+        Return the top_k most likely states with amplitudes sqrt(p), where p is
+        renormalized over the retained states so that every fingerprint has unit norm.
+        """
+        top = sorted(counts.items(), key=lambda item: item[1], reverse=True)[: self.top_k]
+        total = sum(count for _, count in top)
+        if total == 0:
+            return []
+        return [(state, np.sqrt(count / total)) for state, count in top]
+
+    def add(self, word, counts):
+        """Add a word with its counts (or probabilities) to the index."""
+        top = self.top_amplitudes(counts)
+        if not top:
+            raise ValueError(f"Counts for word '{word}' are empty.")
+
+        # Nur die wahrscheinlichsten top_k Zustände behalten
+        columns = np.zeros(self.top_k, dtype=np.int32)
+        amplitudes = np.zeros(self.top_k, dtype=np.float16)
+        for slot, (state, amplitude) in enumerate(top):
+            if state not in self.states:
+                self.states[state] = len(self.state_labels)
+                self.state_labels.append(state)
+            columns[slot] = self.states[state]
+            amplitudes[slot] = amplitude
+
+        self.rows.setdefault(word, len(self.words))
+        self.words.append(word)
+        self._pending.append((columns, amplitudes))
+
+    def _stack(self):
+        """Append pending rows to the fingerprint matrices."""
+        if self._pending:
+            columns, amplitudes = zip(*self._pending)
+            self.columns = np.vstack([self.columns, np.stack(columns)])
+            self.amplitudes = np.vstack([self.amplitudes, np.stack(amplitudes)])
+            self._pending = []
+            self._postings = None
+
+    def postings(self):
+        """Return the inverted index: state column -> (rows, amplitudes) of the words storing it."""
+        self._stack()
+        if self._postings is None:
+            rows, slots = np.nonzero(self.amplitudes)  # Leere Plätze gehören zu keinem Zustand
+            columns = np.asarray(self.columns[rows, slots])
+            amplitudes = np.asarray(self.amplitudes[rows, slots], dtype=np.float32)
+            order = np.argsort(columns, kind="stable")
+            columns, rows, amplitudes = columns[order], rows[order], amplitudes[order]
+            starts = np.flatnonzero(np.r_[True, columns[1:] != columns[:-1]])
+            ends = np.r_[starts[1:], len(columns)]
+            self._postings = {
+                int(columns[start]): (rows[start:end], amplitudes[start:end])
+                for start, end in zip(starts, ends)
+            }
+        return self._postings
+
+    def overlaps(self, counts):
+        """Return (rows, fidelities) of all words that share at least one state with the counts."""
+        postings = self.postings()
+        rows, weights = [], []
+        # Die Anfrage wird wie die gespeicherten Fingerabdrücke auf top_k gekürzt
+        for state, amplitude in self.top_amplitudes(counts):
+            posting = postings.get(self.states.get(state))
+            if posting is not None:  # Unbekannte Zustände überlappen mit keinem Wort
+                rows.append(posting[0])
+                weights.append(posting[1] * np.float32(amplitude))
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        # Bhattacharyya-Überlapp nur der Wörter, die einen Zustand mit der Anfrage teilen
+        rows, weights = np.concatenate(rows), np.concatenate(weights)
+        if len(rows) < len(self.words) // 8:
+            # Wenige Treffer: nur die betroffenen Zeilen aufsummieren
+            rows, inverse = np.unique(rows, return_inverse=True)
+            overlap = np.bincount(inverse, weights=weights)
+            return rows, overlap**2
+        overlap = np.bincount(rows, weights=weights, minlength=len(self.words))
+        rows = np.flatnonzero(overlap)
+        return rows, overlap[rows] ** 2
+
+    def fidelities(self, counts):
+        """Return the classical fidelity between the given counts and every indexed word."""
+        rows, fidelities = self.overlaps(counts)
+        result = np.zeros(len(self.words))
+        result[rows] = fidelities
+        return result
+
+    def nearest(self, counts, n=1):
+        """Return the n nearest words to the given counts as (word, fidelity) pairs, [] if empty."""
+        n = min(n, len(self.words))
+        if n <= 0:
+            return []
+        rows, fidelities = self.overlaps(counts)
+        if len(rows) > n:
+            best = np.argpartition(-fidelities, n - 1)[:n]
+        else:
+            best = np.arange(len(rows))
+        best = best[np.argsort(-fidelities[best], kind="stable")]
+        nearest = [(self.words[rows[i]], float(fidelities[i])) for i in best]
+
+        # Fehlende Plätze mit Wörtern ohne gemeinsamen Zustand auffüllen
+        matched = set(rows.tolist())
+        for row, word in enumerate(self.words):
+            if len(nearest) >= n:
+                break
+            if row not in matched:
+                nearest.append((word, 0.0))
+        return nearest
+
+    def max_state(self, word):
+        """Return the most likely state stored for a word, or None if it is not indexed."""
+        self._stack()
+        row = self.rows.get(word)
+        if row is None:
+            return None
+        return self.state_labels[self.columns[row, 0]]
+
+    def collisions(self):
+        """Return all most likely states that are shared by more than one word."""
+        self._stack()
+        words_by_state = {}
+        for word, column in zip(self.words, self.columns[:, 0]):
+            words_by_state.setdefault(self.state_labels[column], []).append(word)
+        return {state: words for state, words in words_by_state.items() if len(words) > 1}
+
+    def save(self, directory):
+        """Save the index so that it can be loaded memory-mapped."""
+        self._stack()
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "columns.npy"), self.columns)
+        np.save(os.path.join(directory, "amplitudes.npy"), self.amplitudes)
+        with open(os.path.join(directory, "index.json"), "w") as file:
+            json.dump(
+                {"top_k": self.top_k, "words": self.words, "states": self.state_labels},
+                file,
+            )
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Load an index saved with save(), memory-mapping the fingerprint matrices."""
+        with open(os.path.join(directory, "index.json"), "r") as file:
+            data = json.load(file)
+        mmap_mode = "r" if mmap else None
+
+        index = cls(top_k=data["top_k"])
+        index.words = data["words"]
+        index.rows = {word: row for row, word in enumerate(index.words)}
+        index.state_labels = data["states"]
+        index.states = {state: column for column, state in enumerate(index.state_labels)}
+        index.columns = np.load(os.path.join(directory, "columns.npy"), mmap_mode=mmap_mode)
+        index.amplitudes = np.load(
+            os.path.join(directory, "amplitudes.npy"), mmap_mode=mmap_mode
+        )
+        return index
+
+    def __len__(self):
+        return len(self.words)
@@ -1,13 +1,26 @@
+import asyncio
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from qiskit_aer import Aer
 from module.circuit import Circuit  # Importiere die Circuit-Klasse
+from module.product_state import ProductStateResult
+from module.seeding import get_rng  # Globaler Zufallsgenerator
 
 
 class Optimizer:
-    def __init__(self, circuit, target_state, learning_rate, max_iterations):
+    def __init__(
+        self,
+        circuit,
+        target_state,
+        learning_rate,
+        max_iterations,
+        rng=None,
+        loss_history=None,
+    ):
         self.circuit = circuit
+        self.loss_history = loss_history  # z.B. LossHistory; None = vollständige Liste
+        self.rng = rng if rng is not None else get_rng()  # Zufallsgenerator für Phasen
         self.target_state = target_state
         self.learning_rate = learning_rate
         self.max_iterations = max_iterations
@@ -22,23 +35,33 @@ class Optimizer:
         loss = -target_probability  # Minimiere die negative Wahrscheinlichkeit
         return loss
 
+    def result_loss(self, result):
+        """Return the loss of a run: exact for product-state results, otherwise from the counts."""
+        if isinstance(result, ProductStateResult) and result.state is not None:
+            return -result.state.probability(self.target_state)
+        return self.loss_function(result.get_counts())
+
+    def target_probability(self, result):
+        """Return the probability of the target state in a run."""
+        return -self.result_loss(result)
+
     def optimize(self):
         # Initialisiere beste Phasen und Verlust
         best_phases = np.array(
-            self.circuit.layers[0].tp_matrix
-        )  # Zugriff auf das Layer
+            self.circuit.layers[-1].tp_matrix
+        )  # Zugriff auf das trainierte (letzte) Layer
         best_loss = float("inf")
-        losses = []
+        losses = self.loss_history if self.loss_history is not None else []
 
         # Initialer Lauf und Verteilung
-        self.circuit.run()
+        result = self.circuit.run()
         initial_counts = self.circuit.get_counts()
         self.initial_distribution = self.get_distribution(initial_counts)
         if self.initial_distribution is None:
             print(
                 "Warning: Initial distribution is None. Check circuit run and get_counts()."
             )
-        self.initial_probability = self.initial_distribution.get(self.target_state, 0.0)
+        self.initial_probability = self.target_probability(result)
 
         for iteration in range(self.max_iterations):
             # Evaluiere aktuellen Verlust
@@ -57,23 +80,60 @@ class Optimizer:
             print(f"Iteration {iteration}, Loss: {best_loss}")
 
         # Setze die optimierten Trainingsphasen
-        self.circuit.layers[0].tp_matrix = best_phases.tolist()
+        self.circuit.layers[-1].tp_matrix = best_phases.tolist()
+        self.optimized_phases = best_phases.tolist()
+
+        return best_phases.tolist(), losses
+
+    async def optimize_async(self):
+        """Like optimize(), but both evaluations of an iteration are in flight at once."""
+        best_phases = np.array(self.circuit.layers[-1].tp_matrix)
+        best_loss = float("inf")
+        losses = self.loss_history if self.loss_history is not None else []
+
+        # Initialer Lauf und Verteilung
+        result = await self.circuit.run_async()
+        self.initial_distribution = self.get_distribution(self.circuit.get_counts())
+        self.initial_probability = self.target_probability(result)
+
+        for iteration in range(self.max_iterations):
+            # Aktuelle und neue Phasen gleichzeitig evaluieren
+            new_phases = self.update_phases(best_phases)
+            current_loss, new_loss = await asyncio.gather(
+                self.evaluate_async(best_phases), self.evaluate_async(new_phases)
+            )
+            losses.append(current_loss)
+
+            # Akzeptiere neue Phasen bei besserem Verlust
+            if new_loss < best_loss:
+                best_phases = new_phases
+                best_loss = new_loss
+
+            print(f"Iteration {iteration}, Loss: {best_loss}")
+
+        # Setze die optimierten Trainingsphasen
+        self.circuit.layers[-1].tp_matrix = best_phases.tolist()
         self.optimized_phases = best_phases.tolist()
 
         return best_phases.tolist(), losses
 
     def evaluate(self, training_phases):
         # Update des Circuits mit neuen Trainingsphasen
-        self.circuit.layers[0].tp_matrix = training_phases.tolist()
-        self.circuit.run()
+        self.circuit.layers[-1].tp_matrix = training_phases.tolist()
+        result = self.circuit.run()
+
+        # Verlust aus den Resultatzählungen (bzw. exakt für Produktzustände)
+        return self.result_loss(result)
 
-        # Erhalte Resultatzählungen
-        counts = self.circuit.get_counts()
-        return self.loss_function(counts)
+    async def evaluate_async(self, training_phases):
+        # Phasen setzen; run_async übernimmt sie, bevor andere Evaluierungen sie ändern
+        self.circuit.layers[-1].tp_matrix = training_phases.tolist()
+        result = await self.circuit.run_async()
+        return self.result_loss(result)
 
     def update_phases(self, current_phases):
         # Erzeuge kleine zufällige Änderungen an den Trainingsphasen
-        new_phases = current_phases + np.random.normal(
+        new_phases = current_phases + self.rng.normal(
             0, self.learning_rate, current_phases.shape
         )
         return new_phases
@@ -113,13 +173,13 @@ class AdamOptimizer(Optimizer):
         self.epsilon = epsilon
 
         # Verwende das erste Layer für Trainingsphasen
-        self.m = np.zeros_like(self.circuit.layers[0].tp_matrix)
-        self.v = np.zeros_like(self.circuit.layers[0].tp_matrix)
+        self.m = np.zeros_like(self.circuit.layers[-1].tp_matrix)
+        self.v = np.zeros_like(self.circuit.layers[-1].tp_matrix)
         self.t = 0
 
     def update_phases(self, current_phases):
         self.t += 1
-        gradient = np.random.normal(0, self.learning_rate, current_phases.shape)
+        gradient = self.rng.normal(0, self.learning_rate, current_phases.shape)
         self.m = self.beta1 * self.m + (1 - self.beta1) * gradient
         self.v = self.beta2 * self.v + (1 - self.beta2) * (gradient**2)
         m_hat = self.m / (1 - self.beta1**self.t)
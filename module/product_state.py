@@ -0,0 +1,110 @@
+import heapq
+import numpy as np
+
+
+class ProductState:
+    """Stores a state of single-qubit gates as one 2-vector per qubit instead of 2^n amplitudes."""
+
+    def __init__(self, factors):
+        self.factors = np.asarray(factors, dtype=complex)  # Form (qubits, 2)
+
+    @classmethod
+    def zero(cls, qubits):
+        """Return the state |0...0> on the given number of qubits."""
+        factors = np.zeros((qubits, 2), dtype=complex)
+        factors[:, 0] = 1.0
+        return cls(factors)
+
+    @property
+    def qubits(self):
+        return len(self.factors)
+
+    def evolve(self, layer):
+        """Return the state after applying a layer of single-qubit L-Gates."""
+        return self.apply(layer.matrices())
+
+    def apply(self, matrices):
+        """Return the state after applying one 2x2 unitary per qubit, shape (qubits, 2, 2)."""
+        return ProductState(np.einsum("qij,qj->qi", matrices, self.factors))
+
+    def angles(self):
+        """
+        Return (theta, phi) per qubit such that U(theta, phi, 0)|0> prepares each factor
+        up to a global phase.
+        """
+        theta = 2 * np.arctan2(np.abs(self.factors[:, 1]), np.abs(self.factors[:, 0]))
+        phi = np.angle(self.factors[:, 1]) - np.angle(self.factors[:, 0])
+        return theta, phi
+
+    def one_probabilities(self):
+        """Return the probability of measuring 1 on each qubit."""
+        return np.abs(self.factors[:, 1]) ** 2
+
+    def probability(self, bitstring):
+        """Return the probability of a bitstring (qubit 0 is the rightmost character)."""
+        bits = np.array([int(bit) for bit in reversed(bitstring)], dtype=bool)
+        probabilities = np.abs(self.factors) ** 2
+        return float(np.prod(np.where(bits, probabilities[:, 1], probabilities[:, 0])))
+
+    def max_state(self):
+        """Return the most likely bitstring (per-qubit argmax) and its exact probability."""
+        one_probabilities = self.one_probabilities()
+        bits = one_probabilities > 0.5
+        probability = np.prod(np.where(bits, one_probabilities, 1 - one_probabilities))
+        return "".join("1" if bit else "0" for bit in reversed(bits)), float(probability)
+
+    def top_states(self, k):
+        """
+        Return the k most likely bitstrings with their exact probabilities, most likely first.
+        Starting from the per-qubit argmax, flipping qubit i costs log(p_max / p_min); the
+        k cheapest sets of flips are enumerated with a heap instead of 2^n probabilities.
+        """
+        one_probabilities = self.one_probabilities()
+        bits = one_probabilities > 0.5
+        high = np.where(bits, one_probabilities, 1 - one_probabilities)
+        with np.errstate(divide="ignore"):
+            costs = np.log(high) - np.log1p(-high)  # log(p_max) - log(p_min) >= 0
+        order = np.argsort(costs)
+        costs = costs[order]
+        best_probability = float(np.prod(high))
+
+        top = {}
+        heap = [(0.0, -1, ())]  # (Kosten, letzter Index in order, geflippte Indizes)
+        while heap and len(top) < k:
+            cost, last, flipped = heapq.heappop(heap)
+            state = bits.copy()
+            state[order[list(flipped)]] ^= True
+            top["".join("1" if bit else "0" for bit in reversed(state))] = best_probability * float(
+                np.exp(-cost)
+            )
+            following = last + 1
+            if following < len(costs) and np.isfinite(costs[following]):
+                # Nächsten Qubit zusätzlich flippen, oder den letzten durch ihn ersetzen
+                heapq.heappush(heap, (cost + costs[following], following, flipped + (following,)))
+                if last >= 0:
+                    heapq.heappush(
+                        heap,
+                        (cost - costs[last] + costs[following], following, flipped[:-1] + (following,)),
+                    )
+        return top
+
+    def sample_counts(self, shots, rng=None):
+        """Sample measurement counts without building the full distribution."""
+        rng = rng if rng is not None else np.random.default_rng()
+        samples = rng.random((shots, self.qubits)) < self.one_probabilities()
+        rows, counts = np.unique(samples[:, ::-1], axis=0, return_counts=True)
+        return {
+            "".join("1" if bit else "0" for bit in row): int(count)
+            for row, count in zip(rows, counts)
+        }
+
+
+class ProductStateResult:
+    """Minimal result of a product-state simulation, compatible with Result.get_counts()."""
+
+    def __init__(self, counts, state=None):
+        self.counts = counts
+        self.state = state  # Simulierter ProductState für exakte Wahrscheinlichkeiten
+
+    def get_counts(self, experiment=None):
+        return self.counts
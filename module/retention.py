@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+import numpy as np
+
+
+class LossHistory:
+    """Loss history with bounded memory: a float32 ring buffer or a downsampled full run."""
+
+    MODES = ("downsample", "ring")
+
+    def __init__(self, capacity=1024, mode="downsample", trace_file=None):
+        self.check_options(capacity, mode)
+        self.capacity = capacity
+        self.mode = mode
+        self.buffer = np.zeros(capacity, dtype=np.float32)
+        self.size = 0  # Belegte Einträge im Puffer
+        self.count = 0  # Insgesamt angehängte Verluste
+        self.stride = 1  # Iterationen pro Eintrag (downsample)
+        self._bucket = []  # Noch nicht gemittelte Verluste (downsample)
+
+        # Optional: vollständigen Verlauf als rohe float32-Werte auf die Platte schreiben
+        self.trace_file = trace_file
+        self._trace = open(trace_file, "wb") if trace_file else None
+
+    @classmethod
+    def check_options(cls, capacity, mode):
+        """Raise ValueError for an unknown mode or a capacity that is not even and >= 2."""
+        if mode not in cls.MODES:
+            raise ValueError(
+                f"Unknown loss history mode '{mode}'. Choose one of {', '.join(cls.MODES)}."
+            )
+        if not isinstance(capacity, int) or capacity < 2 or capacity % 2:
+            raise ValueError("capacity must be an even number of at least 2.")
+
+    def append(self, loss):
+        """Add the loss of one iteration."""
+        self.count += 1
+        if self._trace is not None:
+            self._trace.write(np.float32(loss).tobytes())
+
+        if self.mode == "ring":
+            self.buffer[(self.count - 1) % self.capacity] = loss
+            self.size = min(self.size + 1, self.capacity)
+            return
+
+        self._bucket.append(loss)
+        if len(self._bucket) < self.stride:
+            return
+        if self.size == self.capacity:
+            # Puffer voll: je zwei Einträge mitteln und die Schrittweite verdoppeln
+            half = self.capacity // 2
+            self.buffer[:half] = self.buffer.reshape(half, 2).mean(axis=1)
+            self.size = half
+            self.stride *= 2
+            if len(self._bucket) < self.stride:
+                return
+        self.buffer[self.size] = np.mean(self._bucket)
+        self.size += 1
+        self._bucket = []
+
+    def values(self):
+        """Return the retained losses as a float32 array in iteration order."""
+        if self.mode == "ring" and self.count > self.capacity:
+            start = self.count % self.capacity
+            return np.concatenate([self.buffer[start:], self.buffer[:start]])
+        values = self.buffer[: self.size].copy()
+        if self._bucket:
+            # Angefangenen Block als Mittelwert anhängen
+            values = np.append(values, np.float32(np.mean(self._bucket)))
+        return values
+
+    def iterations(self):
+        """
+        Return the (0-based) iteration of every value in values(): the iteration itself in
+        ring mode, the center of the averaged block in downsample mode.
+        """
+        if self.mode == "ring":
+            return np.arange(max(self.count - self.capacity, 0), self.count, dtype=float)
+        iterations = np.arange(self.size) * self.stride + (self.stride - 1) / 2
+        if self._bucket:
+            iterations = np.append(iterations, self.size * self.stride + (len(self._bucket) - 1) / 2)
+        return iterations
+
+    def close(self):
+        """Close the trace file, if any."""
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
+
+    @staticmethod
+    def load_trace(trace_file):
+        """Return the full loss trace written to a trace file as a read-only memmap."""
+        return np.memmap(trace_file, dtype=np.float32, mode="r")
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return repr(self.values())
+
+
+def top_k_counts(counts, k):
+    """Return only the k most frequent states of a counts dict."""
+    if k is None or len(counts) <= k:
+        return dict(counts)
+    return dict(sorted(counts.items(), key=lambda item: item[1], reverse=True)[:k])
+
+
+class TraceSpill:
+    """
+    Writes detailed per-item traces (full counts, optionally losses) to compressed npz files.
+    Files are named by the item's position in manifest.jsonl, so any item name is stored
+    without collisions; the manifest holds one JSON-encoded name per line, in position order.
+    """
+
+    MANIFEST = "manifest.jsonl"
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.names = []  # Position -> Name
+        manifest = os.path.join(directory, self.MANIFEST)
+        if os.path.exists(manifest):
+            with open(manifest, "r", encoding="utf-8") as file:
+                self.names = [json.loads(line) for line in file if line.strip()]
+        self.indices = {name: index for index, name in enumerate(self.names)}
+        self._lock = threading.Lock()
+
+    def index(self, name):
+        """Return the position of an item name, registering it in the manifest if it is new."""
+        with self._lock:
+            index = self.indices.get(name)
+            if index is None:
+                index = len(self.names)
+                self.names.append(name)
+                self.indices[name] = index
+                # Nur den neuen Namen anhängen, statt das Manifest neu zu schreiben
+                with open(os.path.join(self.directory, self.MANIFEST), "a", encoding="utf-8") as file:
+                    file.write(json.dumps(name, ensure_ascii=False) + "\n")
+            return index
+
+    def path(self, name, kind="counts", suffix=".npz"):
+        """Return the file path of one kind of trace (e.g. "counts", "initial", "losses") of an item."""
+        return os.path.join(self.directory, f"{self.index(name):06d}_{kind}{suffix}")
+
+    def write(self, name, counts, losses=(), kind="counts"):
+        """Store the full counts (and losses) of an item and return the file path."""
+        path = self.path(name, kind)
+        np.savez_compressed(
+            path,
+            states=np.array(list(counts.keys())),
+            counts=np.array(list(counts.values()), dtype=np.int64),
+            losses=np.asarray(losses, dtype=np.float32),
+        )
+        return path
+
+    @staticmethod
+    def read(path):
+        """Load a trace written by write() as (counts, losses)."""
+        with np.load(path) as data:
+            counts = dict(zip(data["states"].tolist(), data["counts"].tolist()))
+            return counts, data["losses"]
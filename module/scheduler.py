@@ -0,0 +1,20 @@
+import asyncio
+
+
+class JobScheduler:
+    """Runs training coroutines concurrently with a bound on how many are in flight."""
+
+    def __init__(self, max_in_flight=4):
+        if max_in_flight <= 0:
+            raise ValueError("max_in_flight must be greater than 0.")
+        self.max_in_flight = max_in_flight
+
+    async def run(self, coroutines):
+        """Await all coroutines and return their results in the order they were given."""
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        async def limited(coroutine):
+            async with semaphore:
+                return await coroutine
+
+        return await asyncio.gather(*(limited(coroutine) for coroutine in coroutines))
@@ -0,0 +1,46 @@
+import hashlib
+import numpy as np
+
+_seed = None  # Globaler Seed (None = nicht reproduzierbar)
+_seed_sequence = np.random.SeedSequence()
+_rng = np.random.default_rng(_seed_sequence.spawn(1)[0])
+
+
+def set_seed(seed):
+    """Set the global seed and reset the global random generator."""
+    global _seed, _seed_sequence, _rng
+    _seed = seed
+    _seed_sequence = np.random.SeedSequence(seed)
+    _rng = np.random.default_rng(_seed_sequence.spawn(1)[0])
+
+
+def get_seed():
+    """Return the global seed, or None if no seed has been set."""
+    return _seed
+
+
+def get_rng():
+    """Return the global random generator."""
+    return _rng
+
+
+def derive_seed(seed, key):
+    """
+    Return a simulator seed for one word or word sequence, derived from a seed and the key.
+    Equal keys give equal seeds, so training and inference reproduce each other's samples,
+    while different words do not share one random stream. Returns None if seed is None.
+    """
+    if seed is None:
+        return None
+    key_hash = int.from_bytes(hashlib.sha1(key.encode("utf-8")).digest()[:8], "little")
+    return int(np.random.SeedSequence(seed, spawn_key=(key_hash,)).generate_state(1)[0])
+
+
+def circuit_seed(key):
+    """Return the simulator seed of a word or word sequence under the global seed."""
+    return derive_seed(_seed, key)
+
+
+def spawn_rngs(count):
+    """Return independent child generators, e.g. one per concurrently trained word."""
+    return [np.random.default_rng(child) for child in _seed_sequence.spawn(count)]
@@ -0,0 +1,74 @@
+from module.cache import LRUCache  # Begrenzter Speicher für Präfix-Zustände
+from module.circuit import Layer  # Importiere die Layer-Klasse
+from module.product_state import ProductState
+
+
+class PrefixStateCache:
+    """
+    Caches the state after each prefix of word layers, keyed by the word sequence.
+    All L-Gates act on single qubits, so a prefix state is stored as one 2-vector per
+    qubit (ProductState) instead of 2^n amplitudes.
+    """
+
+    def __init__(self, qubits, tp_matrix, tokenize_word, kind="product_state", max_size=4096):
+        self.qubits = qubits
+        # "product_state" oder None (Präfix-Layer im Circuit simulieren)
+        self.kind = kind
+        self.tp_matrix = tp_matrix  # Konstante TP-Matrix aller Präfix-Layer
+        self.tokenize_word = tokenize_word  # Funktion Wort -> IP-Matrix
+        self.states = LRUCache(max_size)  # (wort1, wort2, ...) -> ProductState
+        self.hits = 0
+        self.misses = 0
+
+    def prefix(self, words):
+        """
+        Return (initial_state, prefix_layers) for the words before the trained layer.
+        Either a cached state is returned and no layers, or no state and one layer per word
+        that has to be simulated inside the circuit (density matrix, MPS or noisy runs).
+        """
+        key = tuple(words)
+        if not key:
+            return None, []
+        state = self.get_state(key) if self.kind is not None else None
+        if state is None:
+            return None, [self.layer(word) for word in key]
+        return state, []
+
+    def get_state(self, words):
+        """
+        Return the state after applying one layer per word in sequence, or None if a
+        layer is not a product of single-qubit gates and cannot be cached per qubit.
+        """
+        key = tuple(words)
+        if not key:
+            return ProductState.zero(self.qubits)
+
+        state = self.states.get(key)
+        if state is not None:
+            self.hits += 1
+            return state
+
+        # Nur das letzte Wort wird neu simuliert, der Präfix kommt aus dem Cache
+        self.misses += 1
+        prefix_state = self.get_state(key[:-1])
+        if prefix_state is None:
+            return None
+        layer = self.layer(key[-1])
+        if not layer.is_product():
+            return None  # Verschränkte Layer laufen als Gatter im Circuit
+        state = prefix_state.evolve(layer)
+        self.states.put(key, state)
+        return state
+
+    def layer(self, word):
+        """Return the layer of a single word with the constant TP matrix."""
+        return Layer(self.qubits, self.tp_matrix, self.tokenize_word(word))
+
+    def clear(self):
+        """Drop all cached states, e.g. after the TP matrix has changed."""
+        self.states.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.states)
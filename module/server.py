@@ -0,0 +1,233 @@
+import argparse
+import asyncio
+import json
+import os
+import numpy as np
+from module.backend import BackendManager  # Prozessweiter Simulator mit Transpile-Cache
+from module.cache import LRUCache  # LRU-Cache für heiße Anfragen
+from module.circuit import Circuit, Layer
+from module.index import WordStateIndex  # Nächstes Wort zu einer Verteilung
+from module.product_state import ProductStateResult
+from module.seeding import derive_seed  # Seed pro Wortfolge wie beim Training
+from module.sequence import PrefixStateCache  # Zwischengespeicherte Präfix-Zustände
+from module.tokenizer import Tokenizer
+
+
+class InferenceServer:
+    """Serves "word + word -> word" queries from a trained model over a local socket."""
+
+    def __init__(
+        self,
+        model_directory,
+        batch_window=0.005,
+        max_batch_size=64,
+        cache_size=4096,
+        job_workers=None,
+    ):
+        self.model_directory = model_directory
+        self.batch_window = batch_window  # Sekunden, in denen Anfragen gesammelt werden
+        self.max_batch_size = max_batch_size
+        self.cache_size = cache_size
+        self.job_workers = job_workers  # None = wie beim Training
+        # Alle Caches sind begrenzt, da ihre Schlüssel von den Clients kommen
+        self.query_cache = LRUCache(max_size=cache_size)  # Anfrage -> Antwort
+        self.ip_cache = LRUCache(max_size=cache_size)  # Wort -> IP-Matrix
+        self.queue = None
+        self.load_model()
+
+    def load_model(self):
+        """Load the trained TP matrices and the word-state index once."""
+        with open(os.path.join(self.model_directory, "model.json"), "r") as file:
+            model = json.load(file)
+        self.qubits = model["qubits"]
+        self.shots = model["shots"]
+        self.seed = model["seed"]
+        self.tp_matrix = np.array(model["tp_matrix"])
+        self.trained_phases = {
+            key: np.array(phases) for key, phases in model["trained_phases"].items()
+        }
+
+        self.tokenizer = Tokenizer()
+        self.tokenizer.token_length = model["token_length"]
+        # Simulator wie beim Training; ältere Modelle speichern nur die Methode
+        backend = dict(model.get("backend") or {"method": model["method"], "seed": self.seed})
+        if backend.get("noise_model_file"):
+            backend["noise_model_file"] = os.path.join(
+                self.model_directory, backend["noise_model_file"]
+            )
+        if self.job_workers is not None:
+            backend["job_workers"] = self.job_workers
+        BackendManager.configure(**backend)
+        self.prefix_cache = PrefixStateCache(
+            self.qubits,
+            self.tp_matrix,
+            self.tokenize_word,
+            kind=BackendManager.get().prefix_state_kind(),
+            max_size=self.cache_size,
+        )
+        self.word_index = WordStateIndex.load(self.model_directory)
+        if len(self.word_index) == 0:
+            raise ValueError(f"Model in '{self.model_directory}' has no indexed words.")
+
+    def tokenize_word(self, word):
+        """Return the (cached) IP matrix of a word."""
+        ip_matrix = self.ip_cache.get(word)
+        if ip_matrix is None:
+            ip_matrix = np.array(self.tokenizer.tokenize(word)).T
+            self.ip_cache.put(word, ip_matrix)
+        return ip_matrix
+
+    def build_circuit(self, query):
+        """Build the circuit of a query: cached prefix state plus the trained last layer."""
+        words = query.split()
+        prefix_state, prefix_layers = self.prefix_cache.prefix(words[:-1])
+        tp_matrix = self.trained_phases.get(query, self.tp_matrix)
+        last_layer = Layer(self.qubits, tp_matrix, self.tokenize_word(words[-1]))
+        return Circuit(
+            self.qubits,
+            prefix_layers + [last_layer],
+            self.shots,
+            initial_state=prefix_state,
+            seed=derive_seed(self.seed, " ".join(words)),
+        )
+
+    def evaluate_batch(self, queries):
+        """
+        Evaluate distinct queries. Every simulator circuit is submitted as its own job with
+        the seed of its word sequence, so that an answer does not depend on its position in
+        the batch and matches the evaluation during training. All jobs are submitted before
+        the first result is awaited, so they run concurrently on the backend's job workers.
+        """
+        circuits = [self.build_circuit(query) for query in queries]
+        results = [None] * len(circuits)
+
+        # Produktzustände werden direkt berechnet, der Rest erst abgeschickt, dann abgeholt
+        jobs = {}
+        for position, circuit in enumerate(circuits):
+            if circuit.uses_product_state():
+                results[position] = circuit.run_product_state()
+            else:
+                jobs[position] = circuit.submit()
+        for position, job in jobs.items():
+            results[position] = job.result()
+
+        answers = []
+        for query, result in zip(queries, results):
+            if isinstance(result, ProductStateResult) and result.state is not None:
+                # Exakte Verteilung wie beim Training im Produktzustands-Modus
+                distribution = result.state.top_states(self.word_index.top_k)
+                state = result.state.max_state()[0]
+            else:
+                distribution = result.get_counts()
+                state = max(distribution, key=distribution.get)
+            word, fidelity = self.word_index.nearest(distribution)[0]
+            answers.append(
+                {"query": query, "word": word, "fidelity": fidelity, "state": state}
+            )
+        return answers
+
+    async def query(self, query):
+        """Answer a single query, coalescing it with concurrent ones into one batch."""
+        query = " ".join(query.split())
+        if not query:
+            raise ValueError("Query must contain at least one word.")
+        answer = self.query_cache.get(query)
+        if answer is not None:
+            return answer
+
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((query, future))
+        return await future
+
+    async def batch_worker(self):
+        """Collect queued queries for batch_window seconds and evaluate them together."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Gleiche Anfragen im Batch nur einmal auswerten
+            queries = list(dict.fromkeys(query for query, _ in batch))
+            try:
+                answers = await loop.run_in_executor(None, self.evaluate_batch, queries)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            answers = dict(zip(queries, answers))
+            for query, answer in answers.items():
+                self.query_cache.put(query, answer)
+            for query, future in batch:
+                if not future.done():
+                    future.set_result(answers[query])
+
+    async def handle_client(self, reader, writer):
+        """Answer JSON lines of the form {"query": "König Frau"} until the client disconnects."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    response = await self.query(request["query"])
+                except Exception as e:
+                    response = {"error": str(e)}
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path=None, host="127.0.0.1", port=8765):
+        """Serve on a Unix socket if given, otherwise on a local TCP port."""
+        self.queue = asyncio.Queue()
+        worker = asyncio.create_task(self.batch_worker())
+        if socket_path is not None:
+            server = await asyncio.start_unix_server(self.handle_client, path=socket_path)
+            print(f"LLY-GLLM inference server listening on {socket_path}")
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+            print(f"LLY-GLLM inference server listening on {host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            worker.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a trained LLY-GLLM model.")
+    parser.add_argument("model", nargs="?", default="var/model", help="Model directory")
+    parser.add_argument("--socket", help="Unix socket path (default: local TCP port)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--batch-window", type=float, default=0.005)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--cache-size", type=int, default=4096)
+    parser.add_argument(
+        "--job-workers", type=int, help="Concurrent simulator jobs (default: as in training)"
+    )
+    args = parser.parse_args()
+
+    server = InferenceServer(
+        args.model,
+        batch_window=args.batch_window,
+        max_batch_size=args.max_batch_size,
+        cache_size=args.cache_size,
+        job_workers=args.job_workers,
+    )
+    asyncio.run(server.serve(args.socket, args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,7 @@ class Visual:
         num_iterations,
         qubits,
         depth,
+        loss_iterations=None,
     ):
         self.final_summary = final_summary
         self.comparison_df = comparison_df
@@ -32,6 +33,7 @@ class Visual:
         self.num_iterations = num_iterations
         self.qubits = qubits
         self.depth = depth
+        self.loss_iterations = loss_iterations or {}  # Wort -> Iteration jedes Verlustwerts
         self.styles = getSampleStyleSheet()
 
     def generate_report(self, filename="QuantumCircuitReport.pdf"):
@@ -131,8 +133,18 @@ class Visual:
 
             # Plot Loss Function
             plt.figure(figsize=(10, 5))
-            plt.plot(loss)
-            plt.xlabel('Iteration')
+            # Aufbewahrte Verluste können Blockmittel oder die letzten Iterationen sein
+            iterations = self.loss_iterations.get(word)
+            if iterations is None:
+                plt.plot(loss)
+                plt.xlabel('Iteration')
+            else:
+                plt.plot(iterations, loss)
+                stride = iterations[1] - iterations[0] if len(iterations) > 1 else 1
+                if stride > 1:
+                    plt.xlabel(f'Iteration (mean over blocks of {stride:g} iterations)')
+                else:
+                    plt.xlabel('Iteration')
             plt.ylabel('Loss')
             plt.title(f'Loss Function for {word}')
             plt.tight_layout()
@@ -0,0 +1,437 @@
+import asyncio
+import json
+import threading
+import time
+import numpy as np
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Statevector
+from qiskit_aer.noise import NoiseModel, depolarizing_error
+from main import LLYGLLM
+from module.backend import BackendManager
+from module.cache import EvaluationCache
+from module.circuit import Circuit, Layer
+from module.index import WordStateIndex
+from module.product_state import ProductState
+from module.retention import LossHistory, TraceSpill, top_k_counts
+from module.scheduler import JobScheduler
+from module.seeding import derive_seed
+from module.server import InferenceServer
+from module.sequence import PrefixStateCache
+from module.tokenizer import Tokenizer
+
+
+@pytest.fixture(autouse=True)
+def reset_process_state():
+    """Start every test with a fresh backend manager and evaluation cache."""
+    BackendManager._instance = None
+    EvaluationCache._instance = None
+    yield
+    BackendManager._instance = None
+    EvaluationCache._instance = None
+
+
+def tokenize(word):
+    return np.array(Tokenizer().tokenize(word)).T
+
+
+def write_config(path, **options):
+    config = {
+        "single_words": ["König", "Frau", "Buch", "Königin", "Hund"],
+        "word_combinations": {"König Frau": "Königin", "König Frau Buch": "Hund"},
+        "iterations": 1,
+        "shots": 64,
+    }
+    config.update(options)
+    path.write_text(json.dumps(config))
+    return str(path)
+
+
+def probabilities(circuit):
+    return Statevector(circuit.remove_final_measurements(inplace=False)).probabilities()
+
+
+def test_compile_matches_direct_construction():
+    qubits = 4
+    tp_matrix = np.random.default_rng(0).random((3, qubits)) * 2 * np.pi
+    circuit = Circuit(
+        qubits,
+        [Layer(qubits, tp_matrix, tokenize("König")), Layer(qubits, tp_matrix, tokenize("Frau"))],
+        shots=64,
+    )
+    circuit.layers[-1].tp_matrix = tp_matrix[::-1]  # Geänderte Phasen müssen ankommen
+    circuit.rebuild()
+    assert np.allclose(probabilities(circuit.compile()), probabilities(circuit.circuit))
+
+
+def test_prefix_state_matches_prefix_layers():
+    qubits = 4
+    words = ["König", "Frau", "Buch"]
+    tp_matrix = np.random.default_rng(1).random((3, qubits)) * 2 * np.pi
+    cache = PrefixStateCache(qubits, tp_matrix, tokenize)
+    state, layers = cache.prefix(words)
+    assert layers == [] and len(cache) == 3
+
+    # Präfix als Zustand und als Gatter im Circuit liefern dieselbe Verteilung
+    last_layer = Layer(qubits, tp_matrix[::-1], tokenize("Hund"))
+    cached = Circuit(qubits, [last_layer], 64, initial_state=state)
+    in_circuit = Circuit(qubits, [cache.layer(word) for word in words] + [last_layer], 64)
+    compiled = cached.compile()
+    assert np.allclose(probabilities(compiled), probabilities(in_circuit.circuit))
+
+    # Nur ein 1-Qubit-Gatter pro Qubit, keine Initialisierung mit 2^n Amplituden
+    assert "initialize" not in compiled.count_ops()
+    assert all(len(instruction.qubits) == 1 for instruction in compiled.data)
+
+    bounded = PrefixStateCache(qubits, tp_matrix, tokenize, max_size=2)
+    bounded.prefix(words)
+    assert len(bounded) == 2
+
+    cache.kind = None  # Präfix im Circuit simulieren
+    state, layers = cache.prefix(words)
+    assert state is None and len(layers) == 3
+
+
+def test_density_matrix_with_noise_trains_combinations(tmp_path, monkeypatch):
+    noise_model = NoiseModel()
+    noise_model.add_all_qubit_quantum_error(depolarizing_error(0.05, 1), ["h"])
+    noise_file = tmp_path / "noise.json"
+    noise_file.write_text(json.dumps(noise_model.to_dict(serializable=True)))
+    config = write_config(
+        tmp_path / "train.json",
+        backend={"method": "density_matrix", "noise_model_file": str(noise_file)},
+    )
+    monkeypatch.chdir(tmp_path)  # Der Bericht wird nach var/ geschrieben
+    (tmp_path / "var").mkdir()
+
+    model = LLYGLLM(config)
+    model.create()
+    model.train()
+
+    # Präfixe laufen als Gatter im Circuit, damit das Rauschen auf sie wirkt
+    assert len(model.prefix_cache) == 0
+    assert len(model.final_summary) == 7
+
+    # Der Server simuliert mit denselben Einstellungen wie das Training
+    model.save_model(str(tmp_path / "model"))
+    noise_file.unlink()  # Das Modell bringt sein Rauschmodell mit
+    InferenceServer(str(tmp_path / "model"))
+    manager = BackendManager.get()
+    assert manager.method == "density_matrix" and manager.job_workers == model.max_in_flight
+    assert manager.noise_model is not None
+
+
+def test_reconfiguring_shuts_down_the_old_executor():
+    manager = BackendManager.configure(job_workers=2)
+    executor = manager.executor
+    assert BackendManager.configure(job_workers=2) is manager
+    BackendManager.configure(job_workers=3)
+    assert executor._shutdown and manager.executor is None
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"backend": {"method": "densty_matrix"}},
+        {"evaluation_cache": {"max_size": 0}},
+        {"retention": []},
+        {"retention": {"loss_mode": "rng"}},
+        {"retention": {"loss_capacity": 7}},
+        {"retention": {"top_k_counts": 0}},
+    ],
+)
+def test_invalid_simulation_configuration_raises(tmp_path, options):
+    with pytest.raises(ValueError):
+        LLYGLLM(write_config(tmp_path / "train.json", **options)).load_configuration()
+
+
+def test_product_state_run_async_matches_synchronous_run():
+    BackendManager.configure(method="product_state")
+    qubits = 3
+    tp_matrix = np.random.default_rng(2).random((3, qubits)) * 2 * np.pi
+    circuit = Circuit(qubits, [Layer(qubits, tp_matrix, tokenize("Buch"))], 256, seed=3)
+    assert circuit.uses_product_state()
+
+    counts = asyncio.run(circuit.run_async()).get_counts()
+    assert counts == circuit.run_product_state().get_counts()
+
+
+def test_word_state_index_nearest_and_collisions(tmp_path):
+    index = WordStateIndex(top_k=2)
+    assert index.nearest({"00": 1}) == []
+
+    index.add("König", {"00": 60, "01": 30, "10": 10})
+    index.add("Frau", {"11": 70, "10": 30})
+    index.add("Buch", {"00": 90, "11": 10})
+
+    # Fingerabdrücke sind über die behaltenen top_k Zustände normiert
+    assert np.allclose((index.amplitudes.astype(np.float32) ** 2).sum(axis=1), 1.0, atol=1e-3)
+    word, fidelity = index.nearest({"00": 600, "01": 300, "10": 100})[0]
+    assert word == "König" and np.isclose(fidelity, 1.0, atol=1e-3)
+    assert [word for word, _ in index.nearest({"11": 1}, n=3)][0] == "Frau"
+    assert index.collisions() == {"00": ["König", "Buch"]}
+
+    # Der invertierte Index liefert dieselben Fidelities wie der direkte Vergleich
+    rng = np.random.default_rng(4)
+    large = WordStateIndex(top_k=4)
+    fingerprints = [
+        {format(state, "04b"): int(rng.integers(1, 50)) for state in rng.choice(16, 6)}
+        for _ in range(40)
+    ]
+    for number, counts in enumerate(fingerprints):
+        large.add(f"w{number}", counts)
+    query = fingerprints[7]
+    expected = []
+    for counts in fingerprints:
+        stored = dict(large.top_amplitudes(counts))
+        overlap = sum(amplitude * stored.get(state, 0) for state, amplitude in large.top_amplitudes(query))
+        expected.append(overlap**2)
+    assert np.allclose(large.fidelities(query), expected, atol=1e-3)
+    assert large.nearest(query)[0][0] == "w7"
+
+    index.save(tmp_path)
+    loaded = WordStateIndex.load(tmp_path)
+    assert loaded.nearest({"11": 7, "10": 3})[0][0] == "Frau"
+    assert loaded.max_state("Buch") == "00" and loaded.max_state("Hund") is None
+
+
+def test_evaluation_cache_evicts_least_recently_used_and_skips_unseeded():
+    cache = EvaluationCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" ist jetzt am längsten unbenutzt
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and len(cache) == 2
+
+    qubits = 3
+    layer = Layer(qubits, np.zeros((3, qubits)), tokenize("Buch"))
+    signature = BackendManager.get().signature
+    assert cache.key(Circuit(qubits, [layer], 64), signature) is None
+    assert cache.key(Circuit(qubits, [layer], 64, seed=1), signature) is not None
+
+
+def test_load_configuration_keeps_caches_and_explicit_seed(tmp_path):
+    config = write_config(tmp_path / "train.json", seed=5, evaluation_cache={"max_size": 64})
+    model = LLYGLLM(config, seed=11)
+    model.load_configuration()
+    manager, cache = BackendManager.get(), EvaluationCache.get_default()
+    model.load_configuration()
+
+    assert model.seed == 11
+    assert BackendManager.get() is manager and EvaluationCache.get_default() is cache
+
+    model = LLYGLLM(config)
+    model.load_configuration()
+    assert model.seed == 5 and BackendManager.get() is manager
+    BackendManager.configure(method="density_matrix")
+    assert BackendManager.get() is not manager
+
+
+def test_product_state_matches_statevector():
+    qubits = 4
+    tp_matrix = np.random.default_rng(3).random((3, qubits)) * 2 * np.pi
+    layers = [Layer(qubits, tp_matrix, tokenize(word)) for word in ["König", "Frau"]]
+    reference = QuantumCircuit(qubits)
+    state = ProductState.zero(qubits)
+    for layer in layers:
+        layer.apply(reference)
+        state = state.evolve(layer)
+
+    statevector = Statevector(reference)
+    for index, probability in enumerate(statevector.probabilities()):
+        assert np.isclose(state.probability(format(index, f"0{qubits}b")), probability)
+
+    probabilities = statevector.probabilities()
+    assert np.allclose(sorted(state.top_states(5).values(), reverse=True), np.sort(probabilities)[::-1][:5])
+    max_state, probability = state.max_state()
+    assert int(max_state, 2) == np.argmax(probabilities) and np.isclose(probability, probabilities.max())
+
+
+def test_non_product_prefixes_stay_in_circuit(monkeypatch):
+    qubits = 3
+    tp_matrix = np.zeros((3, qubits))
+    BackendManager.configure(method="matrix_product_state")
+    assert BackendManager.get().prefix_state_kind() is None
+
+    cache = PrefixStateCache(qubits, tp_matrix, tokenize, kind="product_state")
+    monkeypatch.setattr(Layer, "is_product", lambda layer: False)
+    state, layers = cache.prefix(["König", "Frau"])
+    assert state is None and len(layers) == 2 and len(cache) == 0
+
+
+def train_model(tmp_path, monkeypatch, **options):
+    """Train the test vocabulary and save it to tmp_path/model."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "var").mkdir()
+    model = LLYGLLM(write_config(tmp_path / "train.json", **options))
+    model.create()
+    model.train()
+    model.save_model(str(tmp_path / "model"))
+    return model
+
+
+def test_server_answers_do_not_depend_on_batch_position(tmp_path, monkeypatch):
+    model = train_model(tmp_path, monkeypatch, seed=7)
+    server = InferenceServer(str(tmp_path / "model"), cache_size=2)
+    queries = ["König Frau", "Buch Hund", "Frau"]
+    forward = server.evaluate_batch(queries)
+    backward = server.evaluate_batch(queries[::-1])
+    assert forward == backward[::-1]
+    # Gleicher Seed pro Circuit wie beim Training
+    trained = next(entry for entry in model.final_summary if entry["Wort"].startswith("König Frau "))
+    assert forward[0]["state"] == trained["Zustand"]
+    assert len(server.ip_cache) <= 2 and len(server.prefix_cache) <= 2
+
+
+def test_server_coalesces_queries_and_replies_with_errors(tmp_path, monkeypatch):
+    train_model(tmp_path, monkeypatch, seed=7)
+    server = InferenceServer(str(tmp_path / "model"), batch_window=0.05)
+    batches = []
+    evaluate_batch = server.evaluate_batch
+
+    def recording_evaluate_batch(queries):
+        batches.append(queries)
+        return evaluate_batch(queries)
+
+    monkeypatch.setattr(server, "evaluate_batch", recording_evaluate_batch)
+
+    async def scenario():
+        server.queue = asyncio.Queue()
+        worker = asyncio.create_task(server.batch_worker())
+        listener = await asyncio.start_server(server.handle_client, "127.0.0.1", 0)
+        try:
+            answers = await asyncio.gather(
+                server.query("König Frau"), server.query(" König  Frau "), server.query("Buch")
+            )
+            cached = await server.query("König Frau")
+
+            port = listener.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            for line in ['{"query": "Frau"}', '{"query": " "}', "kein json"]:
+                writer.write((line + "\n").encode())
+            await writer.drain()
+            replies = [json.loads(await reader.readline()) for _ in range(3)]
+            writer.close()
+            return answers, cached, replies
+        finally:
+            listener.close()
+            worker.cancel()
+
+    answers, cached, replies = asyncio.run(scenario())
+    # Gleichzeitige Anfragen landen in einem Batch, doppelte werden einmal ausgewertet
+    assert batches[0] == ["König Frau", "Buch"]
+    assert answers[0] == answers[1] == cached and answers[2]["query"] == "Buch"
+    assert replies[0]["query"] == "Frau" and "word" in replies[0]
+    assert "error" in replies[1] and "error" in replies[2]
+    assert len(batches) == 2  # Nur "Frau" kam neu hinzu
+
+
+def test_loss_history_downsample_and_ring(tmp_path):
+    downsampled = LossHistory(capacity=4, mode="downsample", trace_file=str(tmp_path / "loss.f32"))
+    ring = LossHistory(capacity=4, mode="ring")
+    for loss in range(1, 11):
+        downsampled.append(loss)
+        ring.append(loss)
+    downsampled.close()
+
+    # Paarweise gemittelt, der angefangene Block (9, 10) als Mittelwert angehängt
+    assert downsampled.values().tolist() == [2.5, 6.5, 9.5]
+    assert ring.values().tolist() == [7, 8, 9, 10]
+    assert len(ring) == 10
+    # Iteration (0-basiert) jedes Werts: Blockmitte bzw. die letzten Iterationen
+    assert downsampled.iterations().tolist() == [1.5, 5.5, 8.5]
+    assert ring.iterations().tolist() == [6, 7, 8, 9]
+    assert LossHistory.load_trace(downsampled.trace_file).tolist() == list(range(1, 11))
+
+
+def test_top_k_counts():
+    counts = {"00": 5, "01": 20, "10": 1, "11": 10}
+    assert top_k_counts(counts, 2) == {"01": 20, "11": 10}
+    assert top_k_counts(counts, None) == counts
+
+
+def test_trace_spill_round_trip_without_name_collisions(tmp_path):
+    spill = TraceSpill(str(tmp_path))
+    names = ["A B = C", "A_B_C", "König"]
+    paths = [spill.write(name, {"0": index + 1}, [0.5]) for index, name in enumerate(names)]
+    paths.append(spill.write("König", {"1": 9}, kind="initial"))
+    assert len(set(paths)) == 4
+
+    for index, name in enumerate(names):
+        counts, losses = TraceSpill.read(paths[index])
+        assert counts == {"0": index + 1} and losses.tolist() == [0.5]
+    assert TraceSpill.read(paths[-1])[0] == {"1": 9}
+
+    # Das Manifest ordnet die Dateien nach einem Neustart denselben Namen zu
+    reopened = TraceSpill(str(tmp_path))
+    assert [reopened.path(name) for name in names] == paths[:3]
+
+
+def test_several_simulator_jobs_are_in_flight(tmp_path, monkeypatch):
+    model = LLYGLLM(write_config(tmp_path / "train.json", max_in_flight=3))
+    model.load_configuration()
+    assert BackendManager.get().job_workers == 3
+
+    active, peak, lock = 0, 0, threading.Lock()
+    submit = Circuit.submit
+
+    def tracking_submit(circuit, *args, **kwargs):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)  # Läuft außerhalb der Event-Loop, andere Jobs kommen dazu
+        try:
+            return submit(circuit, *args, **kwargs)
+        finally:
+            with lock:
+                active -= 1
+
+    monkeypatch.setattr(Circuit, "submit", tracking_submit)
+    qubits = 3
+    circuits = [
+        Circuit(qubits, [Layer(qubits, np.full((3, qubits), phase), tokenize("Buch"))], 64)
+        for phase in range(4)
+    ]
+    asyncio.run(JobScheduler(3).run([circuit.run_async() for circuit in circuits]))
+    assert peak > 1
+
+
+def test_seeded_runs_are_identical_and_words_get_their_own_seeds(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "var").mkdir()
+    config = write_config(tmp_path / "train.json", seed=13)
+
+    summaries = []
+    for _ in range(2):
+        EvaluationCache.get_default().clear()  # Beide Läufe wirklich simulieren
+        model = LLYGLLM(config)
+        model.create()
+        model.train()
+        summaries.append((model.initial_summary, model.final_summary))
+    assert repr(summaries[0]) == repr(summaries[1])
+
+    seeds = {derive_seed(13, word) for word in ["König", "Frau", "Buch", "König Frau"]}
+    assert len(seeds) == 4 and derive_seed(13, "Frau") == derive_seed(13, "Frau")
+    assert derive_seed(None, "Frau") is None
+
+
+def test_product_state_mode_trains_on_exact_probabilities(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "var").mkdir()
+    model = LLYGLLM(
+        write_config(tmp_path / "train.json", seed=3, iterations=3, backend={"method": "product_state"})
+    )
+    model.create()
+
+    for entry in model.initial_summary:
+        layer = Layer(model.qubits, model.tp_matrix, model.tokenize_word(entry["Wort"]))
+        state = ProductState.zero(model.qubits).evolve(layer)
+        # Per-Qubit-Argmax statt des häufigsten von wenigen Stichproben
+        assert (entry["Zustand"], entry["Wahrscheinlichkeit"]) == state.max_state()
+        assert model.word_index.max_state(entry["Wort"]) == entry["Zustand"]
+
+    model.train()
+    losses = np.concatenate([entry["Loss"] for entry in model.final_summary])
+    # Exakte Verluste statt Vielfacher von 1/shots
+    assert not np.allclose(losses * model.shots, np.round(losses * model.shots))